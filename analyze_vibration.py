@@ -1,101 +1,280 @@
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # plots are only saved to files, skip GUI backend imports
 import matplotlib.pyplot as plt
 
+# SciPy is optional: its pocketfft backend is multi-threaded, numpy.fft is the fallback
+try:
+    from scipy.fft import rfft, rfftfreq, next_fast_len
+    _FFT_KWARGS = {'workers': -1, 'overwrite_x': True}
+except ImportError:
+    from numpy.fft import rfft, rfftfreq
+    _FFT_KWARGS = {}
+
+    def next_fast_len(target, real=True):
+        # Smallest 5-smooth length >= target, matching scipy.fft.next_fast_len for real input
+        n = target
+        while True:
+            m = n
+            for p in (2, 3, 5):
+                while m % p == 0:
+                    m //= p
+            if m == 1:
+                return n
+            n += 1
+
+# pyarrow is optional: used by --stream to parse a single CSV column block by block
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+# Working precision: the 23-bit PCM samples fit exactly in float32, which halves FFT bandwidth
+_DTYPE = np.float32
+
+# Segments transformed per batched rFFT call (bounds the temporary [block, nperseg] matrices)
+_SEG_BLOCK = 64
+
+@lru_cache(maxsize=1)
+def _numba_welch_kernel():
+    """
+    Opt-in parallel JIT Welch kernel (numba + rocket-fft, which registers np.fft for numba).
+    Imported and compiled only on first use since that costs far more than a single PSD;
+    returns None when either package is missing.
+    """
+    try:
+        import numba
+        import rocket_fft  # noqa: F401
+    except ImportError:
+        return None
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _welch_accum(x, w, step, nperseg, n_fft, n_seg, U, fs, detrend):
+        # Detrend, window, transform and accumulate |X|^2 per segment without temporaries
+        out = np.zeros(n_fft // 2 + 1)
+        for s in numba.prange(n_seg):
+            seg = x[s * step:s * step + nperseg].copy()
+            if detrend:
+                seg -= seg.mean()
+            seg *= w
+            X = np.fft.rfft(seg, n_fft)
+            out += X.real**2 + X.imag**2
+        return out / (n_seg * fs * U)
+
+    return _welch_accum
+
 def read_csv_column(path, column=0, skiprows=0):
+    # Fast path: parse only the requested column straight to float
+    if isinstance(column, int):
+        try:
+            df = pd.read_csv(path, header=None, skiprows=skiprows, usecols=[column], dtype=_DTYPE,
+                             engine='c', na_filter=False, memory_map=True)
+            return df.iloc[:, 0].to_numpy(dtype=_DTYPE)
+        except ValueError:
+            pass  # non-numeric or truncated rows, use the robust path below
     # Robust reader using pandas, then convert to numpy array
     df = pd.read_csv(path, header=None, skiprows=skiprows)
     if isinstance(column, int):
         s = df.iloc[:, column]
     else:
         s = df[column]
-    x = pd.to_numeric(s, errors='coerce').dropna().to_numpy(dtype=float)
+    x = pd.to_numeric(s, errors='coerce').dropna().to_numpy(dtype=_DTYPE)
     return x
 
+def read_csv_column_stream(path, column=0, skiprows=0):
+    """
+    Read one numeric column without building a DataFrame: pyarrow's block-wise
+    reader when installed, otherwise a plain line iterator.
+    Falls back to read_csv_column for named columns or rows that do not parse.
+    """
+    if not isinstance(column, int):
+        return read_csv_column(path, column=column, skiprows=skiprows)
+    try:
+        if pa is not None:
+            name = f'f{column}'
+            table = pa_csv.read_csv(
+                path,
+                read_options=pa_csv.ReadOptions(skip_rows=skiprows, autogenerate_column_names=True, block_size=1 << 24),
+                convert_options=pa_csv.ConvertOptions(include_columns=[name], column_types={name: pa.float32()}))
+            col = table.column(0).drop_null()
+            return col.to_numpy().astype(_DTYPE, copy=False)
+        with open(path) as f:
+            for _ in range(skiprows):
+                next(f, None)
+            return np.fromiter((float(line.split(',')[column]) for line in f if line.strip()), dtype=_DTYPE)
+    except (ValueError, IndexError):
+        # pyarrow.ArrowInvalid is a ValueError: non-numeric or truncated rows
+        return read_csv_column(path, column=column, skiprows=skiprows)
+
+@lru_cache(maxsize=16)
+def _window(name, n):
+    """
+    Cached window of length n with its power sum U and coherent gain.
+    Returns (w, U, cg); w is read-only since it is shared between calls,
+    and stored in the working precision so it does not upcast the segments.
+    """
+    if name == 'hann':
+        w = np.hanning(n)
+    elif name == 'hamming':
+        w = np.hamming(n)
+    else:
+        w = np.ones(n)
+    U = float((w * w).sum())
+    cg = float(w.mean())
+    w = w.astype(_DTYPE)
+    w.setflags(write=False)
+    return w, U, cg
+
+def _mag2(X):
+    """Squared magnitude of a complex spectrum without the abs()+square temporaries."""
+    r = X.real
+    i = X.imag
+    return r * r + i * i
+
+@lru_cache(maxsize=8)
+def _lowpass_fir(fpass, fstop):
+    """
+    Cached Blackman-windowed-sinc low-pass FIR. fpass and fstop are the passband and
+    stopband edges in cycles/sample; the cutoff sits halfway between them and the
+    length is chosen so the transition fits in between (~74 dB stopband).
+    """
+    fc = 0.5 * (fpass + fstop)
+    ntaps = int(np.ceil(5.5 / (fstop - fpass))) | 1
+    n = np.arange(ntaps) - (ntaps - 1) / 2
+    h = 2 * fc * np.sinc(2 * fc * n) * np.blackman(ntaps)
+    h = (h / h.sum()).astype(_DTYPE)
+    h.setflags(write=False)
+    return h
+
+def decimate(x, fs, fmax):
+    """
+    Low-pass filter and downsample x when only frequencies up to fmax are needed.
+    The filter passes up to fmax and stops by fs/D - fmax, so nothing aliases into
+    0..fmax. Only every D-th filter output is computed (polyphase). Densities and
+    amplitudes keep their units since the analysis functions normalize by the new fs.
+    Returns (x_decimated, fs_decimated, D); D == 1 means x is returned unchanged.
+    """
+    D = int(fs / (2.2 * fmax)) if fmax is not None and 0 < fmax < fs / 3 else 1
+    if D < 2:
+        return x, fs, 1
+    h = _lowpass_fir(fmax / fs, (fs / D - fmax) / fs)
+    half = (len(h) - 1) // 2
+    xp = np.pad(np.asarray(x, dtype=_DTYPE), half, mode='edge')
+    y = np.lib.stride_tricks.sliding_window_view(xp, len(h))[::D] @ h
+    return y, fs / D, D
+
 def detrend_mean(x):
     return x - np.mean(x)
 
-def welch_psd(x, fs, nperseg=4096, overlap=0.5, window='hann', detrend=True):
+def welch_psd(x, fs, nperseg=4096, overlap=0.5, window='hann', detrend=True, use_numba=False):
     """
-    Compute Welch's averaged periodogram PSD estimate without SciPy.
+    Compute Welch's averaged periodogram PSD estimate (SciPy optional).
+    Segments are zero-padded to n_fft = next_fast_len(nperseg), so the
+    returned frequency grid has n_fft//2+1 bins spaced fs/n_fft apart.
+    use_numba selects the JIT kernel (numba + rocket-fft), which only pays off
+    when many PSDs are computed in one process.
     Returns freqs (Hz) and psd (units^2/Hz).
     """
-    x = np.asarray(x, dtype=float)
+    x = np.asarray(x, dtype=_DTYPE)
     N = len(x)
     if nperseg > N:
         nperseg = N
     step = int(nperseg * (1.0 - overlap))
     if step <= 0:
         step = 1
-    # Window
-    if window == 'hann':
-        w = np.hanning(nperseg)
-    elif window == 'hamming':
-        w = np.hamming(nperseg)
-    else:
-        w = np.ones(nperseg)
-    U = (w**2).sum()  # window normalization factor
-
-    segments = []
-    for start in range(0, N - nperseg + 1, step):
-        seg = x[start:start + nperseg].copy()
-        if detrend:
-            seg -= seg.mean()
-        seg *= w
-        X = np.fft.rfft(seg, n=nperseg)
-        psd_seg = (np.abs(X)**2) / (fs * U)
-        segments.append(psd_seg)
+    # Window and its normalization factor U
+    w, U, _ = _window(window, nperseg)
+    n_fft = next_fast_len(nperseg, real=True)
 
-    if len(segments) == 0:
+    idx = np.arange(0, N - nperseg + 1, step)
+    if len(idx) == 0:
         # Fallback: zero-pad single segment
-        seg = x.copy()
-        if detrend:
-            seg -= seg.mean()
+        seg = x - x.mean() if detrend else x.copy()
         if len(seg) < nperseg:
             pad = np.zeros(nperseg - len(seg))
             seg = np.concatenate([seg, pad])
         seg *= w
-        X = np.fft.rfft(seg, n=nperseg)
-        psd = (np.abs(X)**2) / (fs * U)
+        X = rfft(seg, n=n_fft, **_FFT_KWARGS)
+        psd = _mag2(X) / (fs * U)
+    elif use_numba and _numba_welch_kernel() is not None:
+        psd = _numba_welch_kernel()(np.ascontiguousarray(x), w, step, nperseg, n_fft, len(idx), U, fs, detrend)
     else:
-        psd = np.mean(np.vstack(segments), axis=0)
+        # Transform segments in batches of [_SEG_BLOCK, nperseg] and accumulate |X|^2 into one buffer
+        windows = np.lib.stride_tricks.sliding_window_view(x, nperseg)
+        acc = np.zeros(n_fft // 2 + 1)
+        for b in range(0, len(idx), _SEG_BLOCK):
+            S = windows[idx[b:b + _SEG_BLOCK]]
+            # The window view is read-only; detrend/window produce the single contiguous copy
+            if detrend:
+                S = S - S.mean(axis=1, keepdims=True)
+                S *= w
+            else:
+                S = S * w
+            X = rfft(S, n=n_fft, axis=1, **_FFT_KWARGS)
+            acc += _mag2(X).sum(axis=0)
+        psd = acc / (len(idx) * fs * U)
 
-    freqs = np.fft.rfftfreq(nperseg, d=1.0/fs)
+    freqs = rfftfreq(n_fft, d=1.0/fs)
     return freqs, psd
 
 def amplitude_spectrum(x, fs, window='hann', detrend=True):
     """
     Single-sided amplitude spectrum (linear amplitude per bin, not density).
+    The signal is zero-padded to next_fast_len(len(x)) before the transform.
     Returns freqs (Hz) and amplitude (units).
     """
-    x = np.asarray(x, dtype=float)
+    x = np.asarray(x, dtype=_DTYPE)
     N = len(x)
     if detrend:
         x = x - x.mean()
-    if window == 'hann':
-        w = np.hanning(N)
-    elif window == 'hamming':
-        w = np.hamming(N)
-    else:
-        w = np.ones(N)
+    w, _, cg = _window(window, N)
     xw = x * w
-    X = np.fft.rfft(xw)
-    # Coherent gain of the window for amplitude correction
-    cg = w.mean()
+    n_fft = next_fast_len(N, real=True)
+    X = rfft(xw, n=n_fft, **_FFT_KWARGS)
     # Single-sided amplitude (account for discarded negative freqs except DC/Nyquist)
-    amp = (np.abs(X) / (N * cg))
-    if N % 2 == 0:
-        # even N includes Nyquist bin
+    amp = np.sqrt(_mag2(X)) * (1.0 / (N * cg))
+    if n_fft % 2 == 0:
+        # even length includes Nyquist bin
         amp[1:-1] *= 2.0
     else:
         amp[1:] *= 2.0
-    freqs = np.fft.rfftfreq(N, d=1.0/fs)
+    freqs = rfftfreq(n_fft, d=1.0/fs)
     return freqs, amp
 
-def plot_psd(freqs, psd, outpath, fmax=None, title='Welch PSD'):
-    plt.figure()
+def amplitude_from_psd(psd, fs, nperseg, window='hann'):
+    """
+    Single-sided amplitude spectrum derived from a welch_psd result, avoiding a
+    full-length FFT. nperseg/window must match the welch_psd call; the result
+    is on the Welch frequency grid (coarser than amplitude_spectrum).
+    Returns amplitude (units).
+    """
+    _, U, cg = _window(window, nperseg)
+    # Undo the density scaling to recover |X|, then normalize as amplitude_spectrum does
+    amp = np.sqrt(psd * (fs * U)) * (1.0 / (nperseg * cg))
+    if next_fast_len(nperseg, real=True) % 2 == 0:
+        amp[1:-1] *= 2.0
+    else:
+        amp[1:] *= 2.0
+    return amp
+
+# Figure shared by the plot functions; clearing it is much cheaper than creating a new one per plot
+_FIG = None
+
+def _shared_axes():
+    global _FIG
+    if _FIG is None:
+        _FIG = plt.figure()
+    _FIG.clf()
+    return _FIG.add_subplot()
+
+def plot_psd(freqs, psd, outpath, fmax=None, title='Welch PSD', ax=None):
+    ax = _shared_axes() if ax is None else ax
     if fmax is not None:
         mask = freqs <= fmax
         freqs_plot = freqs[mask]
@@ -103,17 +282,16 @@ def plot_psd(freqs, psd, outpath, fmax=None, title='Welch PSD'):
     else:
         freqs_plot = freqs
         psd_plot = psd
-    plt.semilogy(freqs_plot, psd_plot)
-    plt.xlabel('Frequency (Hz)')
-    plt.ylabel('PSD (units²/Hz)')
-    plt.title(title)
-    plt.grid(True, which='both', linestyle=':')
-    plt.tight_layout()
-    plt.savefig(outpath, dpi=150)
-    plt.close()
-
-def plot_amplitude(freqs, amp, outpath, fmax=None, title='Single-Sided Amplitude Spectrum'):
-    plt.figure()
+    ax.semilogy(freqs_plot, psd_plot)
+    ax.set_xlabel('Frequency (Hz)')
+    ax.set_ylabel('PSD (units²/Hz)')
+    ax.set_title(title)
+    ax.grid(True, which='both', linestyle=':')
+    ax.figure.tight_layout()
+    ax.figure.savefig(outpath, dpi=150)
+
+def plot_amplitude(freqs, amp, outpath, fmax=None, title='Single-Sided Amplitude Spectrum', ax=None):
+    ax = _shared_axes() if ax is None else ax
     if fmax is not None:
         mask = freqs <= fmax
         freqs_plot = freqs[mask]
@@ -121,40 +299,35 @@ def plot_amplitude(freqs, amp, outpath, fmax=None, title='Single-Sided Amplitude
     else:
         freqs_plot = freqs
         amp_plot = amp
-    plt.plot(freqs_plot, amp_plot)
-    plt.xlabel('Frequency (Hz)')
-    plt.ylabel('Amplitude (units)')
-    plt.title(title)
-    plt.grid(True, which='both', linestyle=':')
-    plt.tight_layout()
-    plt.savefig(outpath, dpi=150)
-    plt.close()
-
-def plot_spectrogram(x, fs, outpath, nperseg=1024, overlap=0.75, window='hann', detrend=True, fmax=None, vmax=None):
-    x = np.asarray(x, dtype=float)
+    ax.plot(freqs_plot, amp_plot)
+    ax.set_xlabel('Frequency (Hz)')
+    ax.set_ylabel('Amplitude (units)')
+    ax.set_title(title)
+    ax.grid(True, which='both', linestyle=':')
+    ax.figure.tight_layout()
+    ax.figure.savefig(outpath, dpi=150)
+
+def plot_spectrogram(x, fs, outpath, nperseg=1024, overlap=0.75, window='hann', detrend=True, fmax=None, vmax=None, ax=None):
+    x = np.asarray(x, dtype=_DTYPE)
     if detrend:
         x = x - x.mean()
-    if window == 'hann':
-        w = np.hanning(nperseg)
-    elif window == 'hamming':
-        w = np.hamming(nperseg)
-    else:
-        w = np.ones(nperseg)
+    w, U, _ = _window(window, nperseg)
     step = int(nperseg * (1.0 - overlap))
     if step <= 0:
         step = 1
 
-    segments = []
-    for start in range(0, len(x) - nperseg + 1, step):
-        seg = x[start:start + nperseg].copy()
-        seg -= seg.mean()
-        seg *= w
-        X = np.fft.rfft(seg, n=nperseg)
-        psd_seg = (np.abs(X)**2) / ((w**2).sum() * fs)  # units^2/Hz
-        segments.append(psd_seg)
-
-    Sxx = np.array(segments).T  # shape: [freqs, times]
-    freqs = np.fft.rfftfreq(nperseg, d=1.0/fs)
+    n_fft = next_fast_len(nperseg, real=True)
+    n_seg = 1 + (len(x) - nperseg) // step
+    windows = np.lib.stride_tricks.sliding_window_view(x, nperseg)[::step]
+    Sxx = np.empty((n_fft // 2 + 1, n_seg), dtype=_DTYPE)  # shape: [freqs, times]
+    for b in range(0, n_seg, _SEG_BLOCK):
+        S = windows[b:b + _SEG_BLOCK]
+        S = S - S.mean(axis=1, keepdims=True)
+        S *= w
+        X = rfft(S, n=n_fft, axis=1, **_FFT_KWARGS)
+        Sxx[:, b:b + len(S)] = _mag2(X).T
+    Sxx *= 1.0 / (U * fs)  # units^2/Hz
+    freqs = rfftfreq(n_fft, d=1.0/fs)
     times = np.arange(Sxx.shape[1]) * (step / fs)
 
     if fmax is not None:
@@ -162,34 +335,62 @@ def plot_spectrogram(x, fs, outpath, nperseg=1024, overlap=0.75, window='hann',
         freqs = freqs[fmask]
         Sxx = Sxx[fmask, :]
 
-    # Convert to dB for display
-    Sxx_dB = 10.0 * np.log10(np.maximum(Sxx, np.finfo(float).eps))
+    # Convert to dB for display, in place (Sxx is a local array)
+    np.clip(Sxx, np.finfo(float).eps, None, out=Sxx)
+    np.log10(Sxx, out=Sxx)
+    Sxx *= 10.0
+    Sxx_dB = Sxx
 
-    plt.figure()
+    ax = _shared_axes() if ax is None else ax
     extent = [times[0], times[-1], freqs[0], freqs[-1]] if times.size > 0 else [0, 0, freqs[0], freqs[-1]]
     aspect = 'auto'
-    plt.imshow(Sxx_dB, origin='lower', extent=extent, aspect=aspect, vmin=None, vmax=vmax)
-    plt.xlabel('Time (s)')
-    plt.ylabel('Frequency (Hz)')
-    plt.title('Spectrogram (PSD, dB re units²/Hz)')
-    plt.colorbar(label='dB')
-    plt.tight_layout()
-    plt.savefig(outpath, dpi=150)
-    plt.close()
+    im = ax.imshow(Sxx_dB, origin='lower', extent=extent, aspect=aspect, vmin=None, vmax=vmax,
+                   interpolation='nearest', rasterized=True)
+    ax.set_xlabel('Time (s)')
+    ax.set_ylabel('Frequency (Hz)')
+    ax.set_title('Spectrogram (PSD, dB re units²/Hz)')
+    ax.figure.colorbar(im, ax=ax, label='dB')
+    ax.figure.tight_layout()
+    ax.figure.savefig(outpath, dpi=100, pil_kwargs={'compress_level': 1})
+
+def _psd_job(x, fs, nperseg, overlap, fmax, psd_csv, psd_png, amp_png=None, use_numba=False):
+    # Welch PSD (CSV + plot), optionally with the amplitude plot derived from it
+    freqs_psd, psd = welch_psd(x, fs=fs, nperseg=nperseg, overlap=overlap, window='hann', detrend=True,
+                               use_numba=use_numba)
+    np.savetxt(psd_csv, np.column_stack((freqs_psd, psd)), fmt='%.17g', delimiter=',',
+               header='freq_hz,psd_units2_per_hz', comments='')
+    plot_psd(freqs_psd, psd, psd_png, fmax=fmax)
+    if amp_png is not None:
+        amp = amplitude_from_psd(psd, fs=fs, nperseg=min(nperseg, len(x)), window='hann')
+        plot_amplitude(freqs_psd, amp, amp_png, fmax=fmax)
+
+def _amplitude_job(x, fs, fmax, amp_png):
+    freqs_amp, amp = amplitude_spectrum(x, fs=fs, window='hann', detrend=True)
+    plot_amplitude(freqs_amp, amp, amp_png, fmax=fmax)
+
+def _spectrogram_job(x, fs, nperseg, fmax, spec_png):
+    plot_spectrogram(x, fs=fs, outpath=spec_png, nperseg=nperseg, overlap=0.75, window='hann', detrend=True, fmax=fmax)
 
 def main():
 
-    ap = argparse.ArgumentParser(description='Frequency-domain analysis of vibration CSV data (no SciPy).')
+    ap = argparse.ArgumentParser(description='Frequency-domain analysis of vibration CSV data (SciPy optional).')
     ap.add_argument('--input', required=True, help='Path to CSV file with samples')
     ap.add_argument('--fs', type=float, default=12500, help='Sampling rate in Hz (e.g., 12500)')
     ap.add_argument('--column', default=1, help='Column index or name to read (default: 1)')
     ap.add_argument('--skiprows', type=int, default=1, help='Number of header rows to skip (default: 1)')
     ap.add_argument('--calib', type=float, default=0.00000212, help='Calibration factor to scale raw counts to engineering units (e.g., g per count)')
+    ap.add_argument('--stream', action='store_true', help='Read the column with a streaming parser (pyarrow if installed) instead of pandas')
     ap.add_argument('--nperseg', type=int, default=4096, help='Welch segment length (default: 4096)')
     ap.add_argument('--overlap', type=float, default=0.5, help='Welch overlap fraction 0..0.95 (default: 0.5)')
     ap.add_argument('--fmax', type=float, default=None, help='Max frequency to display (Hz)')
+    ap.add_argument('--amp-from-psd', action='store_true', help='Derive the amplitude plot from the Welch PSD instead of a full-length FFT')
+    ap.add_argument('--no-decimate', action='store_true', help='Analyze at the full rate even when --fmax is well below Nyquist')
+    ap.add_argument('--numba', action='store_true', help='Compute the Welch PSD with the numba JIT kernel (needs numba and rocket-fft; slower for a single file due to compile time)')
+    ap.add_argument('--jobs', type=int, default=3, help='Worker processes for the PSD/amplitude/spectrogram outputs, 1 runs them serially (default: 3)')
     ap.add_argument('--outdir', default=None, help='Output directory for plots and CSV (default: same as CSV file name without extension)')
     args = ap.parse_args()
+    if args.fmax is not None and args.fmax <= 0:
+        ap.error('--fmax must be positive')
 
     # Set default output directory to CSV file's base name if not specified
     if args.outdir is None:
@@ -199,29 +400,43 @@ def main():
     os.makedirs(args.outdir, exist_ok=True)
 
     # Load data
-    x = read_csv_column(args.input, column=int(args.column) if str(args.column).isdigit() else args.column, skiprows=args.skiprows)
+    reader = read_csv_column_stream if args.stream else read_csv_column
+    x = reader(args.input, column=int(args.column) if str(args.column).isdigit() else args.column, skiprows=args.skiprows)
     x = x * args.calib  # apply calibration if provided
+    n_samples = len(x)
+
+    # Fast path: only fmax is displayed, so filter and downsample before any FFT work
+    fs, nperseg, D = args.fs, args.nperseg, 1
+    if not args.no_decimate:
+        x, fs, D = decimate(x, args.fs, args.fmax)
+        nperseg = max(1, args.nperseg // D)
 
-    # Welch PSD
-    freqs_psd, psd = welch_psd(x, fs=args.fs, nperseg=args.nperseg, overlap=args.overlap, window='hann', detrend=True)
     psd_csv = os.path.join(args.outdir, 'psd_welch.csv')
-    pd.DataFrame({'freq_hz': freqs_psd, 'psd_units2_per_hz': psd}).to_csv(psd_csv, index=False)
     psd_png = os.path.join(args.outdir, 'psd_welch.png')
-    plot_psd(freqs_psd, psd, psd_png, fmax=args.fmax)
-
-    # Amplitude spectrum
-    freqs_amp, amp = amplitude_spectrum(x, fs=args.fs, window='hann', detrend=True)
     amp_png = os.path.join(args.outdir, 'amplitude_spectrum.png')
-    plot_amplitude(freqs_amp, amp, amp_png, fmax=args.fmax)
-
-    # Spectrogram
     spec_png = os.path.join(args.outdir, 'spectrogram.png')
-    nperseg_spec = min(max(256, args.nperseg//4), len(x))
-    plot_spectrogram(x, fs=args.fs, outpath=spec_png, nperseg=nperseg_spec, overlap=0.75, window='hann', detrend=True, fmax=args.fmax)
+    nperseg_spec = min(max(256 // D, nperseg//4), len(x))
+
+    # The amplitude plot rides along with the PSD job when it is derived from the PSD
+    jobs = [(_psd_job, (x, fs, nperseg, args.overlap, args.fmax, psd_csv, psd_png,
+                        amp_png if args.amp_from_psd else None, args.numba)),
+            (_spectrogram_job, (x, fs, nperseg_spec, args.fmax, spec_png))]
+    if not args.amp_from_psd:
+        jobs.append((_amplitude_job, (x, fs, args.fmax, amp_png)))
+
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(jobs))) as pool:
+            for future in [pool.submit(fn, *fn_args) for fn, fn_args in jobs]:
+                future.result()
+    else:
+        for fn, fn_args in jobs:
+            fn(*fn_args)
 
     # Quick summary
-    dur = len(x) / args.fs
-    print(f'Analyzed {len(x)} samples ({dur:.2f} s) @ {args.fs} Hz.')
+    dur = n_samples / args.fs
+    print(f'Analyzed {n_samples} samples ({dur:.2f} s) @ {args.fs} Hz.')
+    if D > 1:
+        print(f'Decimated by {D} to {fs:g} Hz for fmax = {args.fmax:g} Hz.')
     print(f'Outputs written to: {os.path.abspath(args.outdir)}')
     print(f'- PSD (CSV): {psd_csv}')
     print(f'- PSD plot: {psd_png}')
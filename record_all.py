@@ -41,19 +41,16 @@ parser = argparse.ArgumentParser(description='Record vibration of CMG.')
 parser.add_argument('-m', '--comment', metavar='comment', help='comment for this execution', default='')
 args = parser.parse_args()
 
-vib_port = recorder.det_vib_port()
-cmg_port = recorder.det_cmg_port()
+vib_port, cmg_port = recorder.det_ports()
 snid = recorder.get_cmg_snid(cmg_port)
 
 info_dir = Path.cwd() / 'whsp_gimsp' / 'info.csv'
 data_dir = Path.cwd() / 'whsp_gimsp' / time.strftime('%Y%m%d_%H%M%S')
 data_dir.mkdir(parents=True, exist_ok=True)
-if not info_dir.exists():
-    with open(info_dir, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Time', 'SNID', 'Title', 'Comment'])
 with open(info_dir, 'a', newline='') as f:
     writer = csv.writer(f)
+    if f.tell() == 0:  # new or empty file, write the header first
+        writer.writerow(['Time', 'SNID', 'Title', 'Comment'])
     writer.writerow([time.strftime('%Y-%m-%d %H:%M:%S'), snid.rstrip('\x00'), 'whsp_gimsp', args.comment])
 
 wheel_speeds = [-100, -90, -80, -70, -60, -50, -40, -30, -20, -10, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
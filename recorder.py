@@ -3,14 +3,114 @@
 recorder.py - Functions for recording vibration and CMG data
 """
 
+import os
+import shutil
 import subprocess
-import re
 import glob
 import time
+import select
 import logging
 logger = logging.getLogger(__name__)
 
-cmg_cli_path = '/home/tt/.local/bin/cmg-cli'
+# pyudev is optional: it reads the udev database in-process instead of running udevadm per device
+try:
+    import pyudev
+    _UDEV_CONTEXT = pyudev.Context()  # created once so libudev loads its database/hwdb once
+except ImportError:
+    pyudev = None
+    _UDEV_CONTEXT = None
+
+def _resolve_executable(name, default):
+    """
+    Resolves an executable to an absolute path once, at import time.
+    Uses `default` if it is executable, otherwise searches PATH.
+    """
+    path = default if os.access(default, os.X_OK) else (shutil.which(name) or default)
+    path = os.path.realpath(path)
+    if not os.access(path, os.X_OK):
+        logger.warning(f"{name} not found or not executable at {path}")
+    return path
+
+# Absolute executable paths plus close_fds=False let subprocess start children with
+# posix_spawn instead of fork+exec. Leaking descriptors is not a concern: Python
+# opens files non-inheritable by default (PEP 446).
+cmg_cli_path = _resolve_executable('cmg-cli', '/home/tt/.local/bin/cmg-cli')
+# read_cdc is expected in bin/ next to this file, or on PATH
+READ_CDC_PATH = _resolve_executable('read_cdc', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bin', 'read_cdc'))
+_UDEVADM_PATH = shutil.which('udevadm') or '/usr/bin/udevadm'  # only used as a fallback
+
+# Detected ports are reused for a short while so repeated sessions skip the device scan
+_VIB_PORT_CACHE = {"port": None, "ts": 0.0}
+_CMG_PORT_CACHE = {"port": None, "ts": 0.0}
+_PORT_CACHE_TTL = 30.0  # seconds
+
+def _cached_port(cache):
+    """Returns the cached port if it is fresh and the device node still exists, else None."""
+    port = cache["port"]
+    if port and time.monotonic() - cache["ts"] < _PORT_CACHE_TTL and os.path.exists(port):
+        return port
+    return None
+
+def _cache_port(cache, port):
+    cache["port"] = port
+    cache["ts"] = time.monotonic()
+    return port
+
+def _sysfs_usb_attr(tty_name, attr):
+    """
+    Reads a sysfs attribute of the USB device behind a tty (e.g. 'manufacturer').
+
+    Returns:
+        str: The attribute value, or None if it cannot be read
+    """
+    # /sys/class/tty/<tty>/device is the USB interface, its parent is the USB device
+    path = os.path.join(os.path.realpath(f'/sys/class/tty/{tty_name}/device'), '..', attr)
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _is_usb_tty(tty_name):
+    """
+    Checks through sysfs, without opening the tty, whether a tty sits on a USB interface.
+    
+    Returns:
+        bool: True if the tty's device belongs to the usb subsystem
+    """
+    try:
+        return os.path.basename(os.readlink(f'/sys/class/tty/{tty_name}/device/subsystem')) == 'usb'
+    except OSError:
+        return False
+
+def _udevadm_export_db():
+    """
+    Dumps the udev database with one `udevadm info --export-db` run.
+
+    Returns:
+        dict: Device node path (e.g. '/dev/ttyACM0') -> {property: value}
+    """
+    result = subprocess.run(
+        [_UDEVADM_PATH, 'info', '--export-db'],
+        capture_output=True,
+        text=True,
+        check=True,
+        close_fds=False
+    )
+    devices = {}
+    # Records are separated by blank lines; 'N:' is the node name under /dev, 'E:' a property
+    for record in result.stdout.split('\n\n'):
+        node = None
+        properties = {}
+        for line in record.splitlines():
+            if line.startswith('N: '):
+                node = '/dev/' + line[3:]
+            elif line.startswith('E: '):
+                key, _, value = line[3:].partition('=')
+                properties[key] = value
+        if node is not None:
+            devices[node] = properties
+    return devices
 
 def det_vib_port():
     """
@@ -19,31 +119,58 @@ def det_vib_port():
     Returns:
         str: The tty device path (e.g., '/dev/ttyACM0') or None if not found
     """
+    port = _cached_port(_VIB_PORT_CACHE)
+    if port:
+        logger.debug(f"Using cached vibration sensor port {port}")
+        return port
+
     try:
-        # Get all ttyACM devices
-        tty_devices = glob.glob('/dev/ttyACM*')
+        if pyudev is not None:
+            # libudev filters by subsystem and property itself, no subprocess per device
+            for dev in _UDEV_CONTEXT.list_devices(subsystem='tty', ID_USB_VENDOR='TensorTech'):
+                if dev.sys_name.startswith('ttyACM'):
+                    logger.debug(f"Found TensorTech vibration sensor on {dev.device_node}")
+                    return _cache_port(_VIB_PORT_CACHE, dev.device_node)
+            logger.warning("No TensorTech vibration sensor found")
+            return None
+
+        # Get all USB ttyACM devices from one listing of the tty class directory;
+        # virtual ACMs are dropped here so they are never probed (or opened)
+        with os.scandir('/sys/class/tty') as entries:
+            tty_devices = ['/dev/' + entry.name for entry in entries
+                           if entry.name.startswith('ttyACM') and _is_usb_tty(entry.name)]
         logger.debug(f"Found ttyACM devices: {tty_devices}")
-        
+
+        # Read the USB manufacturer string straight from sysfs (what udev derives ID_USB_VENDOR from)
+        unresolved = []
         for device in tty_devices:
+            manufacturer = _sysfs_usb_attr(os.path.basename(device), 'manufacturer')
+            if manufacturer is None:
+                unresolved.append(device)
+            elif manufacturer.replace(' ', '_') == 'TensorTech':
+                logger.debug(f"Found TensorTech vibration sensor on {device}")
+                return _cache_port(_VIB_PORT_CACHE, device)
+
+        # Fall back to udevadm only for devices sysfs could not tell us about,
+        # with a single database dump instead of one udevadm run per device
+        if unresolved:
             try:
-                # Run udevadm to get device properties
-                result = subprocess.run(
-                    ['udevadm', 'info', '-q', 'property', '-n', device],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                
+                udev_db = _udevadm_export_db()
+            except subprocess.CalledProcessError:
+                logger.debug("Failed to export the udev database")
+                udev_db = {}
+            for device in unresolved:
+                properties = udev_db.get(device)
+                if properties is None:
+                    # Skip this device if udev knows nothing about it
+                    logger.debug(f"Failed to get properties for {device}")
+                    continue
+
                 # Check if this device has ID_USB_VENDOR=TensorTech
-                if 'ID_USB_VENDOR=TensorTech' in result.stdout:
+                if properties.get('ID_USB_VENDOR') == 'TensorTech':
                     logger.debug(f"Found TensorTech vibration sensor on {device}")
-                    return device
-                    
-            except subprocess.CalledProcessError:
-                # Skip this device if udevadm fails
-                logger.debug(f"Failed to get properties for {device}")
-                continue
-                
+                    return _cache_port(_VIB_PORT_CACHE, device)
+
         logger.warning("No TensorTech vibration sensor found")
         return None
         
@@ -59,28 +186,69 @@ def det_cmg_port():
     Returns:
         str: The first tty device path (e.g., '/dev/ttyAMA4') or None if not found
     """
+    port = _cached_port(_CMG_PORT_CACHE)
+    if port:
+        logger.debug(f"Using cached CMG port {port}")
+        return port
+
     try:
-        # Get all ttyAMA devices
-        tty_devices = glob.glob('/dev/ttyAMA*')
-        logger.debug(f"Found ttyAMA devices: {tty_devices}")
-        
-        if not tty_devices:
+        # First ttyAMA device in sorted order, without building and sorting a list
+        selected_device = min(glob.iglob('/dev/ttyAMA*'), default=None)
+        if selected_device is None:
             logger.warning("No ttyAMA devices found for CMG")
             return None
             
-        # Sort to ensure consistent ordering
-        tty_devices.sort()
-        
-        # Return the first device
-        selected_device = tty_devices[0]
         logger.info(f"Selected CMG port: {selected_device}")
-        return selected_device
+        return _cache_port(_CMG_PORT_CACHE, selected_device)
         
     except Exception as e:
         logger.error(f"Error detecting CMG port: {e}")
         return None
 
 
+def det_ports():
+    """
+    Detects both the vibration sensor and the CMG ports with a single tty scan.
+    Uses one pyudev enumeration when available, otherwise det_vib_port()/det_cmg_port().
+    
+    Returns:
+        tuple: (vib_port, cmg_port), each a tty device path or None if not found
+    """
+    vib_port = _cached_port(_VIB_PORT_CACHE)
+    cmg_port = _cached_port(_CMG_PORT_CACHE)
+    if _UDEV_CONTEXT is None or (vib_port and cmg_port):
+        return vib_port or det_vib_port(), cmg_port or det_cmg_port()
+
+    try:
+        # Classify every tty once: TensorTech ttyACM -> vibration sensor, first ttyAMA -> CMG
+        vib_devices = []
+        cmg_devices = []
+        for dev in _UDEV_CONTEXT.list_devices(subsystem='tty'):
+            if dev.sys_name.startswith('ttyACM') and dev.properties.get('ID_USB_VENDOR') == 'TensorTech':
+                vib_devices.append(dev.device_node)
+            elif dev.sys_name.startswith('ttyAMA') and dev.device_node:
+                cmg_devices.append(dev.device_node)
+        logger.debug(f"Found TensorTech devices: {vib_devices}, ttyAMA devices: {cmg_devices}")
+
+        if vib_port is None:
+            if vib_devices:
+                vib_port = _cache_port(_VIB_PORT_CACHE, vib_devices[0])
+                logger.debug(f"Found TensorTech vibration sensor on {vib_port}")
+            else:
+                logger.warning("No TensorTech vibration sensor found")
+        if cmg_port is None:
+            if cmg_devices:
+                cmg_port = _cache_port(_CMG_PORT_CACHE, min(cmg_devices))
+                logger.info(f"Selected CMG port: {cmg_port}")
+            else:
+                logger.warning("No ttyAMA devices found for CMG")
+        return vib_port, cmg_port
+
+    except Exception as e:
+        logger.error(f"Error detecting ports: {e}")
+        return None, None
+
+
 def get_cmg_snid(tty_dev):
     """
     Reads the SNID of the CMG from the specified tty port.
@@ -97,39 +265,88 @@ def get_cmg_snid(tty_dev):
         
     try:
         logger.debug(f"Getting CMG SNID from {tty_dev}")
-        # Run cmg-cli command to get device info
-        result = subprocess.run(
+        # Run cmg-cli command to get device info, reading its output as it arrives
+        proc = subprocess.Popen(
             [cmg_cli_path, 'get', '-n', '-p', tty_dev],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=10  # Add timeout to prevent hanging
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            close_fds=False
         )
-        
-        # Search for SNID in the output
-        for line in result.stdout.splitlines():
-            if 'SNID:' in line:
-                # Extract SNID value (format: "SNID: TCM102052")
-                match = re.search(r'SNID:\s*(\S+)', line)
-                if match:
-                    snid = match.group(1)
-                    logger.debug(f"Found CMG SNID: {snid}")
-                    return snid
-                    
-        logger.warning(f"SNID not found in CMG response from {tty_dev}")
-        return None
-        
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error running cmg-cli: {e}")
-        return None
-    except subprocess.TimeoutExpired:
-        logger.error(f"Timeout waiting for cmg-cli response on {tty_dev}")
+        # The 10 s limit applies to the reads themselves, so it also holds when a
+        # grandchild of cmg-cli keeps stdout open after cmg-cli exits
+        deadline = time.monotonic() + 10
+        fd = proc.stdout.fileno()
+        buf = b''
+        expired = False
+        try:
+            # Return on the first SNID line (format: "SNID: TCM102052"); the output
+            # is scanned as bytes, only the SNID itself gets decoded
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                    expired = True
+                    break
+                chunk = os.read(fd, 4096)
+                buf += chunk
+                *lines, buf = buf.split(b'\n')
+                if not chunk:
+                    lines.append(buf)  # EOF: the last line may lack a newline
+                for line in lines:
+                    idx = line.find(b'SNID:')
+                    fields = line[idx + 5:].split(None, 1) if idx >= 0 else None
+                    if fields:
+                        snid = fields[0].decode('ascii', errors='replace')
+                        logger.debug(f"Found CMG SNID: {snid}")
+                        return snid
+                if not chunk:
+                    break
+        finally:
+            if proc.poll() is None:
+                # The rest of the output is not needed
+                proc.terminate()
+            try:
+                proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+
+        if expired:
+            logger.error(f"Timeout waiting for cmg-cli response on {tty_dev}")
+        elif proc.returncode != 0:
+            logger.error(f"Error running cmg-cli: exit code {proc.returncode}")
+        else:
+            logger.warning(f"SNID not found in CMG response from {tty_dev}")
         return None
+
     except Exception as e:
         logger.error(f"Error getting CMG SNID: {e}")
         return None
 
 
+def _run_cmg_cli(args, timeout=10):
+    """
+    Runs one cmg-cli command (e.g. ['set', '--idle', '-p', port]).
+
+    All set commands go through here, so a long-lived cmg-cli session can
+    replace the per-call process once cmg-cli offers a command/stdin mode.
+
+    Returns:
+        subprocess.CompletedProcess: Callers check returncode themselves
+
+    Raises:
+        subprocess.TimeoutExpired
+    """
+    return subprocess.run(
+        [cmg_cli_path, *args],
+        stdout=subprocess.DEVNULL,  # only stderr is ever looked at
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=timeout,
+        close_fds=False
+    )
+
+
 def rot_wh_gim(wheel_speed, gimbal_speed, cmg_port=None):
     """
     Starts rotation of both the CMG wheel and gimbal.
@@ -152,22 +369,15 @@ def rot_wh_gim(wheel_speed, gimbal_speed, cmg_port=None):
     try:
         logger.debug(f"Start CMG rotation: wheel={wheel_speed} rps, gimbal={gimbal_speed} rps on {cmg_port}")
         # Run cmg-cli command to set wheel and gimbal speeds
-        result = subprocess.run(
-            [cmg_cli_path, 'set', '--cmg', f'{wheel_speed},{gimbal_speed}', '-p', cmg_port],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=10
-        )
+        result = _run_cmg_cli(['set', '--cmg', f'{wheel_speed},{gimbal_speed}', '-p', cmg_port])
+        if result.returncode:
+            _CMG_PORT_CACHE["ts"] = 0.0  # re-detect the port next time
+            logger.error(f"Error setting CMG rotation: cmg-cli exited with code {result.returncode}")
+            if result.stderr:
+                logger.debug(f"stderr: {result.stderr}")
+            return False
         return True
         
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error setting CMG rotation: {e}")
-        if e.stdout:
-            logger.debug(f"stdout: {e.stdout}")
-        if e.stderr:
-            logger.debug(f"stderr: {e.stderr}")
-        return False
     except subprocess.TimeoutExpired:
         logger.error(f"Timeout setting CMG rotation on {cmg_port}")
         return False
@@ -176,6 +386,47 @@ def rot_wh_gim(wheel_speed, gimbal_speed, cmg_port=None):
         return False
 
 
+def wait_cmg_ready(cmg_port, timeout=5.0, interval=0.1):
+    """
+    Waits until the CMG reports RUNNING (`cmg-cli get --status`), polling every `interval` seconds.
+    If the status cannot be queried, waits out the full timeout like a fixed delay.
+    
+    Args:
+        cmg_port (str): CMG tty port
+        timeout (float): Maximum time to wait in seconds
+        interval (float): Polling interval in seconds
+        
+    Returns:
+        bool: True if the CMG reported RUNNING, False if the timeout elapsed
+    """
+    deadline = time.monotonic() + timeout
+    status_available = True
+    while status_available:
+        try:
+            result = subprocess.run(
+                [cmg_cli_path, 'get', '--status', '-p', cmg_port],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=max(deadline - time.monotonic(), interval),
+                close_fds=False
+            )
+            if result.returncode != 0:
+                logger.debug(f"CMG status not available (exit code {result.returncode}), waiting {timeout} s instead")
+                status_available = False
+            elif b'RUNNING' in result.stdout:
+                logger.debug("CMG reports RUNNING")
+                return True
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.debug(f"CMG status not available ({e}), waiting {timeout} s instead")
+            status_available = False
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining) if status_available else remaining)
+    return False
+
+
 def record(output_path, duration, vib_port=None):
     """
     Records vibration data for a specified duration using read_cdc.
@@ -186,7 +437,7 @@ def record(output_path, duration, vib_port=None):
         vib_port (str, optional): Vibration sensor tty port. If None, will auto-detect
         
     Returns:
-        bool: True if recording completed successfully (timeout exit code 124), False otherwise
+        bool: True if read_cdc was still recording after `duration` seconds and stopped cleanly, False otherwise
     """
     # Auto-detect vibration port if not provided
     if vib_port is None:
@@ -196,33 +447,36 @@ def record(output_path, duration, vib_port=None):
             return False
     
     try:
-        # Use timeout command to limit recording duration
-        # read_cdc should be in the bin/ directory or PATH
-        read_cdc_path = './bin/read_cdc'  # Assuming read_cdc is in bin/ directory
-        
         logger.info(f"Starting recording for {duration} seconds to {output_path} from {vib_port}")
-        result = subprocess.run(
-            ['timeout', str(duration), read_cdc_path, '-p', vib_port, '-o', output_path],
-            capture_output=True,
+        proc = subprocess.Popen(
+            [READ_CDC_PATH, '-p', vib_port, '-o', output_path],
+            stdout=subprocess.DEVNULL,  # only the startup banner, not needed
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=duration + 5  # Add extra timeout buffer
+            close_fds=False
         )
-        
-        # Check if timeout command exited with code 124 (successful timeout)
-        if result.returncode == 124:
+        try:
+            _, stderr = proc.communicate(timeout=duration)
+        except subprocess.TimeoutExpired:
+            # Still recording after the full duration: SIGTERM makes read_cdc flush and close the CSV
+            proc.terminate()
+            try:
+                proc.communicate(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                logger.error("read_cdc did not exit after SIGTERM, output may be incomplete")
+                return False
             logger.info(f"Recording completed successfully for {duration} seconds to {output_path}")
             return True
-        else:
-            logger.error(f"Recording failed with exit code {result.returncode}")
-            if result.stdout:
-                logger.debug(f"stdout: {result.stdout}")
-            if result.stderr:
-                logger.debug(f"stderr: {result.stderr}")
-            return False
-            
-    except subprocess.TimeoutExpired:
-        logger.error(f"Recording process exceeded timeout limit")
+
+        # read_cdc exited on its own before the duration elapsed
+        _VIB_PORT_CACHE["ts"] = 0.0  # re-detect the port next time
+        logger.error(f"Recording failed with exit code {proc.returncode}")
+        if stderr:
+            logger.debug(f"stderr: {stderr}")
         return False
+            
     except Exception as e:
         logger.error(f"Error during recording: {e}")
         return False
@@ -247,24 +501,17 @@ def stop(cmg_port=None):
     try:
         logger.info(f"Setting CMG to idle state on {cmg_port}")
         # Run cmg-cli command to set CMG to idle
-        result = subprocess.run(
-            [cmg_cli_path, 'set', '--idle', '-p', cmg_port],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=10
-        )
+        result = _run_cmg_cli(['set', '--idle', '-p', cmg_port])
+        if result.returncode:
+            _CMG_PORT_CACHE["ts"] = 0.0  # re-detect the port next time
+            logger.error(f"Error setting CMG to idle: cmg-cli exited with code {result.returncode}")
+            if result.stderr:
+                logger.debug(f"stderr: {result.stderr}")
+            return False
         
         logger.info("Successfully set CMG to idle state")
         return True
         
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error setting CMG to idle: {e}")
-        if e.stdout:
-            logger.debug(f"stdout: {e.stdout}")
-        if e.stderr:
-            logger.debug(f"stderr: {e.stderr}")
-        return False
     except subprocess.TimeoutExpired:
         logger.error(f"Timeout setting CMG to idle on {cmg_port}")
         return False
@@ -276,12 +523,9 @@ if __name__ == "__main__":
     """Test the functions"""
     logger.info("Starting device detection and testing...")
     
-    # Test vibration port detection
-    vib_port = det_vib_port()
+    # Test vibration sensor and CMG port detection
+    vib_port, cmg_port = det_ports()
     logger.info(f"Vibration sensor port: {vib_port}")
-    
-    # Test CMG port detection
-    cmg_port = det_cmg_port()
     logger.info(f"CMG port: {cmg_port}")
     
     # Test CMG SNID reading
@@ -292,17 +536,22 @@ if __name__ == "__main__":
         logger.warning("No CMG port found for SNID test")
     
     # Test CMG rotation (commented out to avoid accidental activation)
+    wheel_speed = 100
+    rotating = False
     if cmg_port:
         logger.info("Testing CMG rotation...")
-        success = rot_wh_gim(100, 0.5, cmg_port)
+        success = rot_wh_gim(wheel_speed, 0.5, cmg_port)
         logger.info(f"CMG rotation test: {'Success' if success else 'Failed'}")
         
         # Raise exception if rotation failed
         if not success:
             logger.critical("CMG rotation failed - cannot proceed with test")
             raise RuntimeError("CMG rotation failed - cannot proceed with test")
+        rotating = True
 
-    time.sleep(5)
+        # Let the CMG spin up; returns as soon as it reports RUNNING.
+        # Spin-up time scales with the target speed, about 5 s per 100 of wheel speed
+        wait_cmg_ready(cmg_port, timeout=max(1.0, abs(wheel_speed) / 100 * 5))
     
     # Test recording (commented out to avoid accidental recording)
     if vib_port:
@@ -312,7 +561,10 @@ if __name__ == "__main__":
         
         if not success:
             logger.error("Recording test failed")
-        success = stop(cmg_port)
+
+    # Only stop the CMG if the rotation was actually started
+    if rotating:
+        stop(cmg_port)
         
     
     logger.info("All tests completed successfully")